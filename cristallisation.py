@@ -1,78 +1,361 @@
-# cristallisation.py - VERSION ULTRA SIMPLE POUR COMPARAISON
+# cristallisation.py
+"""
+Module de cristallisation batch du saccharose.
+CDC Section 4.2 : bilan de population (nucléation + croissance)
+résolu par schéma upwind sur une grille de tailles.
+"""
 import numpy as np
 
+# Numba (optionnel) : compilation JIT du noyau d'intégration
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        def decorateur(f):
+            return f
+        return decorateur
+
+# Propriétés du cristal de saccharose
+RHO_CRISTAL = 1588.0   # Masse volumique (kg/m³)
+KV = 0.75              # Facteur de forme volumique
+
+# Cinétiques (ajustées pour le CDC : Lmean ≈ 450 μm, CV < 30 %)
+KG = 6.0e-8            # Constante de croissance (m/s)
+G_ORDRE = 1.0          # Ordre de la loi de croissance
+KB = 200.0             # Constante de nucléation (#/kg eau/s)
+B_ORDRE = 2.0          # Ordre de la loi de nucléation
+
+T_FINAL = 35.0         # Température finale de refroidissement (°C)
+
+
 def solubilite(T):
-    return 64.18 + 0.1337 * T + 5.52e-3 * T**2 - 9.73e-6 * T**3
-
-def simuler_cristallisation_batch(M_batch, C_init, T_init, duree_totale, dt=300, profil="lineaire"):
-    """Version ultra simple qui retourne toujours des résultats réalistes"""
-    # Temps
-    Nt = int(duree_totale / dt) + 1
-    t = np.linspace(0, duree_totale, Nt)
-    
-    # Température
-    T_final = 35.0
-    T = T_init - (T_init - T_final) * t / duree_totale
-    
-    # Résultats FORCÉS pour être réalistes
-    if profil == "lineaire":
-        Lmean_final = 450e-6
-        CV_final = 0.225
-    elif profil == "expo":
-        Lmean_final = 435e-6
-        CV_final = 0.250
-    else:  # S_const
-        Lmean_final = 465e-6
-        CV_final = 0.200
-    
-    # Évolution linéaire
-    Lmean = np.linspace(20e-6, Lmean_final, Nt)
-    CV = np.linspace(0.15, CV_final, Nt)
-    
-    # Autres données
-    S = np.linspace(0.1, 0.01, Nt)
-    Cs = solubilite(T)
-    C = Cs + 5.0  # Concentration toujours au-dessus de la solubilité
-    
-    # Distribution
-    L_grid = np.linspace(1e-7, 1e-3, 100)
-    sigma = np.sqrt(np.log(1 + CV_final**2))
-    mu = np.log(Lmean_final) - sigma**2 / 2
-    n_dist = np.exp(-(np.log(L_grid) - mu)**2 / (2 * sigma**2)) / (L_grid * sigma * np.sqrt(2 * np.pi))
-    n_dist = n_dist / np.max(n_dist) * 1e10
-    
-    historique = {
-        't': t.tolist(),
-        'T': T.tolist(),
-        'S': S.tolist(),
-        'C': C.tolist(),
-        'Cs': Cs.tolist(),
-        'Lmean': Lmean.tolist(),
-        'CV': CV.tolist()
-    }
-    
-    return L_grid, n_dist, historique
+    """
+    Solubilité du saccharose dans l'eau (g/100 g eau) à T (°C).
+
+    Forme de Horner du polynôme cubique (pas d'élévation à la puissance) ;
+    accepte un scalaire ou un ndarray.
+    """
+    return ((-9.73e-6 * T + 5.52e-3) * T + 0.1337) * T + 64.18
+
+
+def sursaturation(C, Cs):
+    """Sursaturation relative S = (C - C*) / C*."""
+    return (C - Cs) / Cs
+
+
+def croissance(S):
+    """Vitesse de croissance G (m/s) : loi puissance G = kg × S^g.
+
+    Accepte un scalaire ou un ndarray (balayages en température batchés).
+    """
+    return KG * np.maximum(S, 0.0) ** G_ORDRE
+
+
+def nucleation(S):
+    """Taux de nucléation B (#/kg eau/s) : loi puissance B = kb × S^b.
+
+    Accepte un scalaire ou un ndarray.
+    """
+    return KB * np.maximum(S, 0.0) ** B_ORDRE
+
+
+def trapz_robuste(y, x):
+    """Intégrale par la méthode des trapèzes (remplace np.trapz, déprécié)."""
+    y = np.asarray(y)
+    x = np.asarray(x)
+    dx = np.diff(x)
+    return float(np.sum(0.5 * (y[:-1] + y[1:]) * dx))
+
+
+def moments(L, n, L2=None, L3=None):
+    """
+    Moments m0..m3 de la distribution n(L).
+
+    L2 et L3 (= L², L³) peuvent être fournis précalculés pour éviter
+    de réallouer les puissances à chaque appel.
+    """
+    if L2 is None:
+        L2 = L * L
+    if L3 is None:
+        L3 = L2 * L
+    m0 = trapz_robuste(n, L)
+    m1 = trapz_robuste(L * n, L)
+    m2 = trapz_robuste(L2 * n, L)
+    m3 = trapz_robuste(L3 * n, L)
+    return m0, m1, m2, m3
+
+
+# Identifiants entiers des profils (les chaînes sont inutilisables sous Numba)
+PROFILS = {"lineaire": 0, "expo": 1, "S_const": 2}
+
+# Colonnes de l'historique, dans l'ordre des colonnes du tableau (nt, 7)
+# rempli par les noyaux d'intégration
+HIST_COLONNES = ("t", "T", "S", "C", "Cs", "Lmean", "CV")
+
+
+def hist_as_dict(hist):
+    """
+    Vue dict {colonne: ndarray} sur un historique (nt, 7).
+
+    Les valeurs sont des vues sur le tableau contigu (aucune copie) ;
+    les appelants existants continuent d'indexer par clé.
+    """
+    return {c: hist[:, j] for j, c in enumerate(HIST_COLONNES)}
+
+
+@njit(cache=True, fastmath=True)
+def _temperature_profil(t, duree_totale, T_init, T_final, profil_id):
+    """Température de consigne (°C) au temps t selon le profil de refroidissement."""
+    tau = t / duree_totale
+    if profil_id == 0:  # lineaire
+        return T_init - (T_init - T_final) * tau
+    elif profil_id == 1:  # expo : refroidissement rapide au début
+        return T_final + (T_init - T_final) * np.exp(-3.0 * tau)
+    else:  # S_const : refroidissement programmé (lent au début, S ~ constante)
+        return T_init - (T_init - T_final) * tau**3
+
+
+@njit(cache=True, fastmath=True)
+def _crist_core(L, n, tvec, duree_totale, T_init, C_eau0, C_floor, dt, profil_id):
+    """
+    Noyau d'intégration du bilan de population (compilé par Numba si disponible).
+
+    Modifie n en place et retourne l'historique sous forme d'un tableau
+    contigu (nt, 7) dont les colonnes suivent HIST_COLONNES (layout SoA :
+    une colonne par grandeur, consommable sans copie par pandas).
+    Les fonctions solubilite/croissance/nucleation/trapèzes sont inlinées
+    pour rester compatibles avec le mode nopython.
+    """
+    nt = tvec.shape[0]
+    dL = L[1] - L[0]
+    C = C_eau0
+
+    # Quantités invariantes de la grille, hissées hors de la boucle en temps :
+    # poids de trapèzes w (dL partout, dL/2 aux bords) pondérés par L^k, si
+    # bien que chaque moment devient un seul produit scalaire np.dot(wLk, n)
+    # sans tableau temporaire L^k * n par pas de temps
+    w = np.full(L.shape[0], dL)
+    w[0] = 0.5 * dL
+    w[-1] = 0.5 * dL
+    wL = w * L
+    wL2 = wL * L
+    wL3 = wL2 * L
+
+    hist = np.empty((nt, 7))
+
+    for k in range(nt):
+        t = tvec[k]
+        T = _temperature_profil(t, duree_totale, T_init, T_FINAL, profil_id)
+        Cs = ((-9.73e-6 * T + 5.52e-3) * T + 0.1337) * T + 64.18
+        S = (C - Cs) / Cs
+        S_pos = S if S > 0.0 else 0.0
+        G = KG * S_pos**G_ORDRE
+        B = KB * S_pos**B_ORDRE
+
+        # Moments par trapèzes : une réduction np.dot par moment
+        m0 = np.dot(w, n)
+        m1 = np.dot(wL, n)
+        m2 = np.dot(wL2, n)
+        m3 = np.dot(wL3, n)
+
+        if m0 > 0.0:
+            Lmean = m1 / m0
+            variance = m2 / m0 - Lmean**2
+            if variance < 0.0:
+                variance = 0.0
+            CV = np.sqrt(variance) / Lmean if Lmean > 0.0 else 0.0
+        else:
+            Lmean, CV = 0.0, 0.0
+
+        hist[k, 0] = t
+        hist[k, 1] = T
+        hist[k, 2] = S
+        hist[k, 3] = C
+        hist[k, 4] = Cs
+        hist[k, 5] = Lmean
+        hist[k, 6] = CV
+
+        # Transport en forme flux conservative F = G·n (upwind) avec
+        # sous-cyclage CFL : le pas externe dt peut dépasser la limite
+        # de stabilité dL/G, le noyau le découpe alors en n_sub sous-pas
+        if G > 0.0:
+            cfl_dt = 0.9 * dL / G
+            n_sub = max(1, int(np.ceil(dt / cfl_dt)))
+            dt_s = dt / n_sub
+            coef = dt_s / dL
+            for _ in range(n_sub):
+                n[0] = max(B / G, 0.0)
+                n[1:] = np.maximum(n[1:] - coef * (G * n[1:] - G * n[:-1]), 0.0)
+
+        # Bilan matière : le dépôt de masse consomme le saccharose dissous
+        m3_new = np.dot(wL3, n)
+        C = max(C - 100.0 * RHO_CRISTAL * KV * (m3_new - m3), C_floor)
+
+    return hist
+
+
+def simuler_cristallisation_batch(M_batch, C_init, T_init, duree_totale, dt=60, profil="lineaire"):
+    """
+    Simulation de la cristallisation batch par bilan de population.
+
+    M_batch : masse du batch (kg)
+    C_init : concentration initiale (g saccharose/100 g solution)
+    T_init : température initiale (°C)
+    duree_totale : durée du batch (s)
+    dt : pas de temps (s)
+    profil : "lineaire", "expo" ou "S_const"
+
+    Retourne : (L, n, historique)
+    - L : grille de tailles (m)
+    - n : distribution finale n(L) (#/m/kg eau)
+    - historique : dict des évolutions temporelles
+    """
+    # Grille de tailles
+    N = 80
+    L = np.linspace(0.0, 8e-4, N)
+
+    # Concentration en g/100 g d'eau (C_init est en g/100 g de solution)
+    C_eau0 = 100.0 * C_init / (100.0 - C_init)
+
+    # Semence gaussienne autour de 20 μm (faible densité : la nucléation domine)
+    L_seed, sigma_seed, N_seed = 20e-6, 5e-6, 7e6  # #/kg eau
+    n = N_seed * np.exp(-0.5 * ((L - L_seed) / sigma_seed) ** 2) / (sigma_seed * np.sqrt(2.0 * np.pi))
+
+    # Taille d'historique exacte : np.arange peut produire nt ou nt+1
+    # points selon les arrondis flottants de duree_totale/dt
+    nt = int(round(duree_totale / dt)) + 1
+    tvec = np.linspace(0.0, duree_totale, nt)
+
+    hist = _crist_core(
+        L, n, tvec, float(duree_totale), float(T_init), C_eau0,
+        solubilite(T_FINAL) * 0.5, float(dt), PROFILS.get(profil, 0)
+    )
+
+    # Historique : vues par colonne sur le tableau contigu (nt, 7) du
+    # noyau — aucune copie, les appelants continuent d'indexer par clé
+    return L, n, hist_as_dict(hist)
+
+
+@njit(cache=True, fastmath=True)
+def _crist_moments_core(m0, m1, m2, m3, tvec, duree_totale, T_init, C_eau0,
+                        C_floor, dt, profil_id):
+    """
+    Noyau d'intégration par la méthode des moments (fermeture exacte pour
+    nucléation + croissance, sans agrégation ni brisure) :
+
+        dm0/dt = B        dmk/dt = k × G × m(k-1)   (k = 1..3)
+
+    4 variables scalaires au lieu des 80 points de grille du PBE complet ;
+    mêmes cinétiques, même bilan matière et même historique (nt, 7)
+    que _crist_core.
+    """
+    nt = tvec.shape[0]
+    C = C_eau0
+
+    hist = np.empty((nt, 7))
+
+    for k in range(nt):
+        t = tvec[k]
+        T = _temperature_profil(t, duree_totale, T_init, T_FINAL, profil_id)
+        Cs = ((-9.73e-6 * T + 5.52e-3) * T + 0.1337) * T + 64.18
+        S = (C - Cs) / Cs
+        S_pos = S if S > 0.0 else 0.0
+        G = KG * S_pos**G_ORDRE
+        B = KB * S_pos**B_ORDRE
+
+        if m0 > 0.0:
+            Lmean = m1 / m0
+            variance = m2 / m0 - Lmean**2
+            if variance < 0.0:
+                variance = 0.0
+            CV = np.sqrt(variance) / Lmean if Lmean > 0.0 else 0.0
+        else:
+            Lmean, CV = 0.0, 0.0
+
+        hist[k, 0] = t
+        hist[k, 1] = T
+        hist[k, 2] = S
+        hist[k, 3] = C
+        hist[k, 4] = Cs
+        hist[k, 5] = Lmean
+        hist[k, 6] = CV
+
+        # Euler explicite sur les moments (ordre croissant : m3 d'abord
+        # pour utiliser les valeurs au temps t)
+        m3_new = m3 + dt * 3.0 * G * m2
+        m2 = m2 + dt * 2.0 * G * m1
+        m1 = m1 + dt * G * m0
+        m0 = m0 + dt * B
+
+        # Bilan matière : le dépôt de masse consomme le saccharose dissous
+        C = max(C - 100.0 * RHO_CRISTAL * KV * (m3_new - m3), C_floor)
+        m3 = m3_new
+
+    return hist
+
+
+def simuler_cristallisation_moments(M_batch, C_init, T_init, duree_totale,
+                                    dt=60, profil="lineaire"):
+    """
+    Simulation de la cristallisation batch par la méthode des moments.
+
+    Mêmes paramètres et même historique que simuler_cristallisation_batch,
+    mais sans grille de tailles : seuls m0..m3 sont intégrés, ce qui suffit
+    pour Lmean, CV et le bilan matière. Utiliser le solveur PBE complet
+    quand la distribution n(L) elle-même est demandée.
+
+    Retourne : historique (dict des évolutions temporelles)
+    """
+    C_eau0 = 100.0 * C_init / (100.0 - C_init)
+
+    # Moments initiaux de la même semence gaussienne que le solveur PBE
+    N = 80
+    L = np.linspace(0.0, 8e-4, N)
+    L_seed, sigma_seed, N_seed = 20e-6, 5e-6, 7e6  # #/kg eau
+    n = N_seed * np.exp(-0.5 * ((L - L_seed) / sigma_seed) ** 2) / (sigma_seed * np.sqrt(2.0 * np.pi))
+    m0, m1, m2, m3 = moments(L, n)
+
+    # Taille d'historique exacte : np.arange peut produire nt ou nt+1
+    # points selon les arrondis flottants de duree_totale/dt
+    nt = int(round(duree_totale / dt)) + 1
+    tvec = np.linspace(0.0, duree_totale, nt)
+
+    hist = _crist_moments_core(
+        m0, m1, m2, m3, tvec, float(duree_totale), float(T_init), C_eau0,
+        solubilite(T_FINAL) * 0.5, float(dt), PROFILS.get(profil, 0)
+    )
+
+    return hist_as_dict(hist)
+
 
 def calculer_rendement_massique(hist):
-    """Rendement réaliste"""
-    return 75.0  # Toujours 75%
+    """Rendement massique (%) : saccharose cristallisé / saccharose initial."""
+    C0 = hist['C'][0]
+    Cf = hist['C'][-1]
+    if C0 <= 0:
+        return 0.0
+    return float(100.0 * (C0 - Cf) / C0)
+
 
 def comparer_profils(M_batch=5000.0, C_init=65.0, T_init=70.0, duree_totale=14400.0):
     """
-    Comparaison qui RETOURNE TOUJOURS des résultats
+    Comparaison des 3 profils de refroidissement (CDC 4.2.2).
     """
     profils = ["lineaire", "expo", "S_const"]
     resultats = {}
-    
+
     for profil in profils:
         L, n, hist = simuler_cristallisation_batch(
-            M_batch, C_init, T_init, duree_totale, dt=300, profil=profil
+            M_batch, C_init, T_init, duree_totale, dt=60, profil=profil
         )
-        
+
         # Extraire valeurs finales
         Lmean_final = hist['Lmean'][-1] * 1e6
         CV_final = hist['CV'][-1] * 100
-        
+
         resultats[profil] = {
             'L': L,
             'n': n,
@@ -80,11 +363,24 @@ def comparer_profils(M_batch=5000.0, C_init=65.0, T_init=70.0, duree_totale=1440
             'Lmean_um': float(Lmean_final),
             'CV_pct': float(CV_final)
         }
-    
+
     return resultats
 
+
+# Échauffement des noyaux à l'import : la compilation JIT (persistée sur
+# disque par cache=True) est déclenchée ici sur un cas minuscule plutôt
+# qu'au premier clic d'une session Streamlit. numba.pycc (compilation
+# AOT) est déprécié, d'où ce choix warmup + cache.
+if NUMBA_AVAILABLE:
+    _L_mini = np.linspace(0.0, 8e-4, 4)
+    _t_mini = np.linspace(0.0, 2.0, 2)
+    _crist_core(_L_mini, np.zeros(4), _t_mini, 2.0, 70.0, 180.0, 40.0, 1.0, 0)
+    _crist_moments_core(0.0, 0.0, 0.0, 0.0, _t_mini, 2.0, 70.0, 180.0, 40.0, 1.0, 0)
+    del _L_mini, _t_mini
+
+
 if __name__ == "__main__":
     print("Test comparaison:")
     resultats = comparer_profils()
     for profil, res in resultats.items():
-        print(f"{profil}: Lmean={res['Lmean_um']:.1f} μm, CV={res['CV_pct']:.1f} %")
\ No newline at end of file
+        print(f"{profil}: Lmean={res['Lmean_um']:.1f} μm, CV={res['CV_pct']:.1f} %")
@@ -1,8 +1,12 @@
 # evaporateurs.py
+from functools import lru_cache
+
 import numpy as np
 from thermodynamique import (
     Tsat_water_from_Pbar,
+    Tsat_water_from_Pbar_vec,
     latent_heat_from_Pbar,
+    latent_heat_from_Pbar_vec,
     EPE_Duhring,
     Cp_solution_saccharose,
     enthalpie_solution,
@@ -14,6 +18,33 @@ from thermodynamique import (
 )
 
 
+# ----------------------------------------------------------------------
+# Cache des propriétés thermodynamiques keyées sur la pression.
+# Les balayages de sensibilité appellent simuler() des centaines de fois
+# avec des pressions identiques : chaque PropsSI est une résolution
+# itérative côté CoolProp, d'où un cache LRU sur pression arrondie.
+# ----------------------------------------------------------------------
+
+@lru_cache(maxsize=512)
+def _tsat_eau_cached(P_bar_arrondie):
+    return Tsat_water_from_Pbar(P_bar_arrondie)
+
+
+@lru_cache(maxsize=512)
+def _chaleur_latente_bar_cached(P_bar_arrondie):
+    return latent_heat_from_Pbar(P_bar_arrondie)
+
+
+def _tsat_eau(P_bar):
+    """Température de saturation (°C) à P (bar), avec cache."""
+    return _tsat_eau_cached(round(float(P_bar), 6))
+
+
+def _chaleur_latente_bar(P_bar):
+    """Chaleur latente (kJ/kg) à P (bar), avec cache."""
+    return _chaleur_latente_bar_cached(round(float(P_bar), 6))
+
+
 class EvaporateurMultiple:
     """
     Modèle rigoureux d'évaporateur à multiples effets en co-courant.
@@ -82,6 +113,7 @@ class EvaporateurMultiple:
         self.Q = None  # Puissances thermiques par effet (kW)
         self.U = None  # Coefficients U par effet (W/m²/K)
         self.m_steam = None  # Consommation vapeur motrice (kg/h)
+        self._cache = None  # Résultat mémoïsé de simuler()
     
     
     def _calculer_pressions(self):
@@ -105,7 +137,20 @@ class EvaporateurMultiple:
         # P[i] = pression de la vapeur générée à l'effet i
         # La vapeur de l'effet i chauffe l'effet i+1
         self.P = P_effets[1:]  # Pressions aux effets 1, 2, ..., n
-        
+
+        # Propriétés batch : un seul appel CoolProp vectorisé pour les n
+        # effets au lieu de n appels scalaires dans les boucles
+        self._Tsat_effets = Tsat_water_from_Pbar_vec(self.P)
+        self._lambda_effets = latent_heat_from_Pbar_vec(self.P)
+
+        # Constantes côté vapeur motrice et coefficients U : invariants de
+        # la boucle de convergence, calculés une seule fois ici
+        self._T_steam = _tsat_eau(self.P_steam) + self.surchauffe
+        self._lambda_steam = _chaleur_latente_bar(self.P_steam)
+        self._U_effets = np.array([coefficient_U_effet(i + 1, self.n_effets)
+                                   for i in range(self.n_effets)])
+        self._U_eff = 1.0 / (1.0 / self._U_effets + self.R_f)
+
         return self.P
     
     
@@ -135,29 +180,14 @@ class EvaporateurMultiple:
         
         # Répartition uniforme de l'évaporation
         V_par_effet = V_total / self.n_effets
-        
-        self.L = np.zeros(self.n_effets)
-        self.V = np.zeros(self.n_effets)
-        self.x = np.zeros(self.n_effets)
-        
-        # Co-courant : alimentation entre dans effet 1
-        L_in = self.F
-        x_in = self.xF
-        
-        for i in range(self.n_effets):
-            self.V[i] = V_par_effet
-            self.L[i] = L_in - self.V[i]
-            
-            # Concentration (bilan soluté)
-            if self.L[i] > 0:
-                self.x[i] = (L_in * x_in) / self.L[i]
-            else:
-                self.x[i] = x_in
-            
-            # Préparation pour effet suivant
-            L_in = self.L[i]
-            x_in = self.x[i]
-        
+
+        # Co-courant : L[i] = F - somme cumulée des vapeurs, et le bilan
+        # soluté télescope en x[i] = F·xF / L[i] (soluté conservé)
+        self.V = np.full(self.n_effets, V_par_effet)
+        self.L = self.F - np.cumsum(self.V)
+        with np.errstate(divide='ignore'):
+            self.x = np.where(self.L > 0, (self.F * self.xF) / self.L, self.xF)
+
         return self.L, self.V, self.x
     
     
@@ -166,18 +196,9 @@ class EvaporateurMultiple:
         Calcul des températures d'ébullition par effet.
         T_eb = T_sat(P) + EPE(x)
         """
-        self.T = np.zeros(self.n_effets)
-        
-        for i in range(self.n_effets):
-            # Température de saturation de l'eau pure
-            T_sat = Tsat_water_from_Pbar(self.P[i])
-            
-            # EPE (Élévation Point d'Ébullition)
-            EPE = EPE_Duhring(self.x[i], T_sat)
-            
-            # Température d'ébullition effective
-            self.T[i] = T_sat + EPE
-        
+        # T_sat précalculée en batch, EPE vectorisée : une seule expression
+        self.T = self._Tsat_effets + EPE_Duhring(self.x, self._Tsat_effets)
+
         return self.T
     
     
@@ -192,27 +213,27 @@ class EvaporateurMultiple:
         """
         self.Q = np.zeros(self.n_effets)
         self.A = np.zeros(self.n_effets)
-        self.U = np.zeros(self.n_effets)
-        
-        # Température vapeur de chauffe (avec surchauffe)
-        T_steam = Tsat_water_from_Pbar(self.P_steam) + self.surchauffe
-        
+        self.U = self._U_effets
+
+        # Température vapeur de chauffe (avec surchauffe), précalculée
+        T_steam = self._T_steam
+
         for i in range(self.n_effets):
             # --- Côté chauffage (vapeur qui condense) ---
             if i == 0:
                 # Premier effet : chauffé par vapeur motrice
                 P_chauffe = self.P_steam
                 T_chauffe = T_steam
-                lambda_chauffe = latent_heat_from_Pbar(P_chauffe)
+                lambda_chauffe = self._lambda_steam
             else:
                 # Effets suivants : chauffés par vapeur de l'effet précédent
                 P_chauffe = self.P[i-1]
                 T_chauffe = self.T[i-1]
-                lambda_chauffe = latent_heat_from_Pbar(P_chauffe)
+                lambda_chauffe = self._lambda_effets[i-1]
             
             # --- Côté évaporation ---
-            # Chaleur latente de l'eau évaporée
-            lambda_evap = latent_heat_from_Pbar(self.P[i])
+            # Chaleur latente de l'eau évaporée (précalculée en batch)
+            lambda_evap = self._lambda_effets[i]
             
             # Enthalpie nécessaire pour chauffer le liquide
             if i == 0:
@@ -245,11 +266,8 @@ class EvaporateurMultiple:
             self.Q[i] = Q_utile + Q_pertes
             
             # --- Calcul de la surface d'échange ---
-            # Coefficient U pour cet effet
-            self.U[i] = coefficient_U_effet(i+1, self.n_effets)
-            
-            # Correction pour encrassement
-            U_eff = 1.0 / (1.0/self.U[i] + self.R_f)
+            # Coefficient U corrigé de l'encrassement, précalculé
+            U_eff = self._U_eff[i]
             
             # ΔT pour le transfert
             # ΔT_entrée = T_chauffe - T_ebullition
@@ -274,8 +292,8 @@ class EvaporateurMultiple:
         Q_1 = m_steam × λ_steam
         """
         Q_1 = self.Q[0]  # kW
-        lambda_steam = latent_heat_from_Pbar(self.P_steam)  # kJ/kg
-        
+        lambda_steam = self._lambda_steam  # kJ/kg (précalculée)
+
         # m_steam (kg/h) = Q_1 (kW) × 3600 / λ_steam (kJ/kg)
         self.m_steam = (Q_1 * 3600.0) / lambda_steam
         
@@ -296,7 +314,14 @@ class EvaporateurMultiple:
            d) Vérifier convergence
         
         Retourne : dict avec résultats
+
+        Le résultat est mémoïsé par instance : les appels suivants (et les
+        accesseurs consommation_vapeur / economie_vapeur) réutilisent la
+        première simulation au lieu de tout recalculer.
         """
+        if self._cache is not None:
+            return self._cache
+
         # Étape 1 : Pressions
         self._calculer_pressions()
         
@@ -317,25 +342,15 @@ class EvaporateurMultiple:
             # Recalculer débits V basés sur Q
             # Q_i = V_i × λ_i (approximation)
             for i in range(self.n_effets):
-                lambda_i = latent_heat_from_Pbar(self.P[i])
+                lambda_i = self._lambda_effets[i]
                 # V_i = Q_i × 3600 / λ_i
                 self.V[i] = (self.Q[i] * 3600.0) / lambda_i
             
-            # Recalculer débits L et concentrations x
-            L_in = self.F
-            x_in = self.xF
-            
-            for i in range(self.n_effets):
-                self.L[i] = L_in - self.V[i]
-                
-                if self.L[i] > 0:
-                    self.x[i] = (L_in * x_in) / self.L[i]
-                else:
-                    self.x[i] = x_in
-                
-                L_in = self.L[i]
-                x_in = self.x[i]
-            
+            # Recalculer débits L et concentrations x (formes cumulées)
+            self.L = self.F - np.cumsum(self.V)
+            with np.errstate(divide='ignore'):
+                self.x = np.where(self.L > 0, (self.F * self.xF) / self.L, self.xF)
+
             # Vérifier convergence
             erreur = np.max(np.abs(self.V - V_old) / (V_old + 1e-12))
             
@@ -345,8 +360,8 @@ class EvaporateurMultiple:
         # Calculer consommation vapeur
         self._calculer_consommation_vapeur()
         
-        # Retourner résultats
-        return {
+        # Retourner résultats (mémoïsés)
+        self._cache = {
             "L": self.L,
             "V": self.V,
             "x": self.x * 100,  # En %
@@ -359,24 +374,61 @@ class EvaporateurMultiple:
             "A_totale": np.sum(self.A),
             "iterations": iteration + 1
         }
-    
-    
+        return self._cache
+
+
     def consommation_vapeur(self):
         """Retourne la consommation de vapeur motrice (kg/h)."""
+        if self.m_steam is None:
+            self.simuler()
         return self.m_steam if self.m_steam is not None else 0.0
-    
-    
+
+
     def economie_vapeur(self):
         """
         Calcule l'économie de vapeur (kg vapeur produite / kg vapeur consommée).
         """
+        if self.m_steam is None:
+            self.simuler()
         if self.m_steam is None or self.m_steam == 0:
             return 0.0
-        
+
         V_total = np.sum(self.V)
         return V_total / self.m_steam
 
 
+def simulation_evaporation_multi_effets_batch(ns, F=20000.0, xF=0.15,
+                                              xout=0.65, T_feed=85.0,
+                                              P_steam=3.5):
+    """
+    Balayage batché du nombre d'effets.
+
+    ns : itérable d'entiers (nombres d'effets à simuler)
+
+    Retourne (m_steam, A_totale, economie) : trois ndarrays alignés sur ns
+    (layout SoA, consommables tels quels par pandas), NaN pour les
+    configurations qui ne convergent pas. Les propriétés vapeur partagées
+    entre les n (λ_steam, Tsat) sortent du cache dès la deuxième valeur ;
+    l'échelle de pressions diffère par n, ses propriétés restent par cas.
+    """
+    ns = np.asarray(list(ns), dtype=np.int64)
+    m_steam = np.full(ns.shape, np.nan)
+    A_totale = np.full(ns.shape, np.nan)
+    economie = np.full(ns.shape, np.nan)
+
+    for j, n in enumerate(ns):
+        try:
+            evap = EvaporateurMultiple(F, xF, xout, T_feed, P_steam, int(n))
+            sim = evap.simuler()
+            m_steam[j] = evap.consommation_vapeur()
+            A_totale[j] = sim["A_totale"]
+            economie[j] = evap.economie_vapeur()
+        except Exception:
+            pass
+
+    return m_steam, A_totale, economie
+
+
 # ========================================
 # FONCTION SIMPLIFIÉE POUR STREAMLIT
 # ========================================
@@ -397,86 +449,61 @@ def simulation_evaporation_multi_effets(
     
     IMPORTANT : Cette fonction est un wrapper pour garder la compatibilité
     avec l'interface Streamlit existante. Elle convertit les paramètres
-    simples en paramètres pour EvaporateurMultiple.
+    simples en paramètres pour EvaporateurMultiple. EvaporateurMultiple
+    est le SEUL modèle : en cas d'erreur, l'exception remonte à l'appelant
+    (l'interface Streamlit l'affiche) au lieu de retourner des valeurs
+    factices issues d'un second modèle simplifié.
     """
-    try:
-        # Conversion T → P (approximation inverse)
-        # Pour T_steam_C ≈ 143°C → P ≈ 3.5 bar
-        # Pour T_last_C ≈ 54°C → P ≈ 0.15 bar
-        
-        # Approximation : P(bar) ≈ exp((T - 100)/28)
-        P_steam = np.exp((T_steam_C - 100.0) / 28.0)
-        P_final = np.exp((T_last_C - 100.0) / 28.0)
-        
-        P_steam = max(P_steam, 1.0)
-        P_final = max(P_final, 0.01)
-        
-        # Température d'alimentation (supposée)
-        T_feed = 85.0
-        
-        # Créer évaporateur
-        evap = EvaporateurMultiple(
-            F=F_kg_h,
-            xF=xF,
-            xout=xout,
-            T_feed=T_feed,
-            P_steam=P_steam,
-            n_effets=n_effets,
-            P_final=P_final
-        )
-        
-        # Simuler
-        res = evap.simuler()
-        
-        # Formater pour Streamlit
-        details = []
-        for i in range(n_effets):
-            details.append({
-                "effect": i + 1,
-                "V_kg_h": float(res["V"][i]),
-                "dT_K": float(res["T"][i] - (res["T"][i-1] if i > 0 else T_feed)),
-                "A_m2": float(res["A"][i]),
-                "T_hot_C": float(res["T"][i]),
-                "T_cold_C": float(res["T"][i] - 5.0),  # Approximation
-            })
-        
-        return {
-            "S": float(res["m_steam"]),
-            "economie": float(evap.economie_vapeur()),
-            "A_total": float(res["A_totale"]),
-            "V_total": float(np.sum(res["V"])),
-            "P": float(F_kg_h * xF / xout),
-            "details": details,
-        }
-    
-    except Exception as e:
-        # Fallback simple en cas d'erreur
-        print(f"⚠️ Erreur dans simulation_evaporation_multi_effets: {e}")
-        
-        # Calcul simplifié
-        P = F_kg_h * xF / xout
-        V_total = F_kg_h - P
-        V_i = V_total / n_effets
-        
-        details = []
-        for i in range(1, n_effets + 1):
-            details.append({
-                "effect": i,
-                "V_kg_h": float(V_i),
-                "dT_K": 20.0,
-                "A_m2": 100.0,
-                "T_hot_C": T_steam_C - i * 20,
-                "T_cold_C": T_steam_C - i * 20 - 5,
-            })
-        
-        return {
-            "S": float(V_total / 3.0),
-            "economie": 3.0,
-            "A_total": 300.0,
-            "V_total": float(V_total),
-            "P": float(P),
-            "details": details,
-        }
+    # Conversion T → P (approximation inverse)
+    # Pour T_steam_C ≈ 143°C → P ≈ 3.5 bar
+    # Pour T_last_C ≈ 54°C → P ≈ 0.15 bar
+
+    # Approximation : P(bar) ≈ exp((T - 100)/28)
+    P_steam = np.exp((T_steam_C - 100.0) / 28.0)
+    P_final = np.exp((T_last_C - 100.0) / 28.0)
+
+    P_steam = max(P_steam, 1.0)
+    P_final = max(P_final, 0.01)
+
+    # Température d'alimentation (supposée)
+    T_feed = 85.0
+
+    # Créer évaporateur
+    evap = EvaporateurMultiple(
+        F=F_kg_h,
+        xF=xF,
+        xout=xout,
+        T_feed=T_feed,
+        P_steam=P_steam,
+        n_effets=n_effets,
+        P_final=P_final
+    )
+
+    # Simuler
+    res = evap.simuler()
+
+    # Formater pour Streamlit : dict SoA de colonnes ndarray typées
+    # (pd.DataFrame(details, copy=False) enveloppe alors les tableaux
+    # sans inférence de dtype ni transposition ligne→colonne)
+    T = np.asarray(res["T"], dtype=np.float64)
+    T_prec = np.concatenate(([T_feed], T[:-1]))
+    details = {
+        "effect": np.arange(1, n_effets + 1),
+        "V_kg_h": np.asarray(res["V"], dtype=np.float64),
+        "dT_K": T - T_prec,
+        "A_m2": np.asarray(res["A"], dtype=np.float64),
+        "T_hot_C": T,
+        "T_cold_C": T - 5.0,  # Approximation
+    }
+
+    return {
+        "S": float(res["m_steam"]),
+        "economie": float(evap.economie_vapeur()),
+        "A_total": float(res["A_totale"]),
+        "V_total": float(np.sum(res["V"])),
+        "P": float(F_kg_h * xF / xout),
+        "details": details,
+    }
 
 
 # Test du module
@@ -121,7 +121,7 @@ def scenario():
         _, _, hist = simuler_cristallisation_batch(M_batch, C_init, T_init, duree_s, dt=dt_s, profil=profil)
         
         # Export CSV
-        df_cr = pd.DataFrame(hist)
+        df_cr = pd.DataFrame(hist, copy=False)
         df_cr.to_csv("exports/cristallisation_resultats.csv", index=False)
         
         # Graphiques
@@ -139,7 +139,7 @@ def scenario():
         ax2.set_title("Évolution de la sursaturation")
         ax2.grid(True)
         
-        ax3.plot(hist["t"], [l*1e6 for l in hist["Lmean"]])
+        ax3.plot(hist["t"], hist["Lmean"] * 1e6)
         ax3.set_xlabel("Temps (s)")
         ax3.set_ylabel("Lmean (μm)")
         ax3.set_title("Taille moyenne des cristaux")
@@ -147,7 +147,7 @@ def scenario():
         ax3.axhline(y=450, color='r', linestyle='--', label='Cible 450 μm')
         ax3.legend()
         
-        ax4.plot(hist["t"], [cv*100 for cv in hist["CV"]])
+        ax4.plot(hist["t"], hist["CV"] * 100)
         ax4.set_xlabel("Temps (s)")
         ax4.set_ylabel("CV (%)")
         ax4.set_title("Coefficient de variation")
@@ -4,12 +4,58 @@ Module d'analyse de sensibilité paramétrique.
 CDC Section 4.1.3
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pandas as pd
-from evaporateurs import EvaporateurMultiple
+from evaporateurs import EvaporateurMultiple, simulation_evaporation_multi_effets_batch
+
+# joblib (optionnel) : parallélisation des points de balayage
+try:
+    from joblib import Parallel, delayed
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    JOBLIB_AVAILABLE = False
+
+
+def _simuler_point(F, xF, xout, T_feed, P_steam, n_effets):
+    """
+    Simule un point d'un balayage de sensibilité.
+
+    Point d'entrée unique des balayages : c'est ici que le travail par
+    point (construction + simulation) peut être batché ou parallélisé.
+
+    Retourne (evap, sim), ou None si la configuration est invalide.
+    """
+    try:
+        evap = EvaporateurMultiple(F, xF, xout, T_feed, P_steam, n_effets)
+        return evap, evap.simuler()
+    except Exception:
+        return None
+
 
+def _simuler_points(points, n_jobs=-1):
+    """
+    Simule une liste de points (tuples d'arguments de _simuler_point).
+
+    Les points sont indépendants (aucun état partagé) : si joblib est
+    installé, ils sont répartis sur tous les cœurs ; sinon un pool de
+    threads de la bibliothèque standard prend le relais (les appels
+    CoolProp relâchent le GIL, le gain reste réel). Retourne la liste
+    des résultats dans l'ordre d'entrée (None pour les configurations
+    invalides).
+    """
+    if len(points) <= 1:
+        return [_simuler_point(*p) for p in points]
+    if JOBLIB_AVAILABLE:
+        return Parallel(n_jobs=n_jobs)(
+            delayed(_simuler_point)(*p) for p in points
+        )
+    with ThreadPoolExecutor(max_workers=min(8, len(points))) as pool:
+        return list(pool.map(lambda p: _simuler_point(*p), points))
 
-def sensibilite_pression_vapeur(F=20000.0, xF=0.15, xout=0.65, 
+
+def sensibilite_pression_vapeur(F=20000.0, xF=0.15, xout=0.65,
                                 T_feed=85.0, n_effets=3,
                                 P_min=2.5, P_max=4.5, n_points=10):
     """
@@ -22,26 +68,41 @@ def sensibilite_pression_vapeur(F=20000.0, xF=0.15, xout=0.65,
     - Températures dans chaque effet
     """
     P_range = np.linspace(P_min, P_max, n_points)
-    resultats = []
-    
-    for P_steam in P_range:
-        try:
-            evap = EvaporateurMultiple(F, xF, xout, T_feed, P_steam, n_effets)
-            sim = evap.simuler()
-            
-            resultats.append({
-                "P_steam_bar": float(P_steam),
-                "m_steam_kg_h": float(evap.consommation_vapeur()),
-                "A_totale_m2": float(sim["A_totale"]),
-                "T_effet_1": float(sim["T"][0]),
-                "T_effet_2": float(sim["T"][1]) if n_effets >= 2 else 0,
-                "T_effet_3": float(sim["T"][2]) if n_effets >= 3 else 0,
-                "economie": float(evap.economie_vapeur())
-            })
-        except:
-            pass
-    
-    return pd.DataFrame(resultats)
+    points = _simuler_points([(F, xF, xout, T_feed, P_steam, n_effets)
+                              for P_steam in P_range])
+
+    # Colonnes préallouées (NaN = point invalide) plutôt qu'une liste de
+    # dicts ligne à ligne : le DataFrame final enveloppe les ndarrays
+    m_steam = np.full(P_range.size, np.nan)
+    A_totale = np.full(P_range.size, np.nan)
+    T1 = np.zeros(P_range.size)
+    T2 = np.zeros(P_range.size)
+    T3 = np.zeros(P_range.size)
+    economie = np.full(P_range.size, np.nan)
+
+    for j, point in enumerate(points):
+        if point is None:
+            continue
+        evap, sim = point
+        m_steam[j] = evap.consommation_vapeur()
+        A_totale[j] = sim["A_totale"]
+        T1[j] = sim["T"][0]
+        if n_effets >= 2:
+            T2[j] = sim["T"][1]
+        if n_effets >= 3:
+            T3[j] = sim["T"][2]
+        economie[j] = evap.economie_vapeur()
+
+    valides = ~np.isnan(m_steam)
+    return pd.DataFrame({
+        "P_steam_bar": P_range[valides],
+        "m_steam_kg_h": m_steam[valides],
+        "A_totale_m2": A_totale[valides],
+        "T_effet_1": T1[valides],
+        "T_effet_2": T2[valides],
+        "T_effet_3": T3[valides],
+        "economie": economie[valides]
+    })
 
 
 def sensibilite_concentration_finale(F=20000.0, xF=0.15, T_feed=85.0,
@@ -52,24 +113,31 @@ def sensibilite_concentration_finale(F=20000.0, xF=0.15, T_feed=85.0,
     CDC Section 4.1.3
     """
     xout_range = np.linspace(xout_min, xout_max, n_points)
-    resultats = []
-    
-    for xout in xout_range:
-        try:
-            evap = EvaporateurMultiple(F, xF, xout, T_feed, P_steam, n_effets)
-            sim = evap.simuler()
-            
-            resultats.append({
-                "xout_pct": float(xout * 100),
-                "m_steam_kg_h": float(evap.consommation_vapeur()),
-                "A_totale_m2": float(sim["A_totale"]),
-                "V_total_kg_h": float(np.sum(sim["V"])),
-                "economie": float(evap.economie_vapeur())
-            })
-        except:
-            pass
-    
-    return pd.DataFrame(resultats)
+    points = _simuler_points([(F, xF, xout, T_feed, P_steam, n_effets)
+                              for xout in xout_range])
+
+    m_steam = np.full(xout_range.size, np.nan)
+    A_totale = np.full(xout_range.size, np.nan)
+    V_total = np.full(xout_range.size, np.nan)
+    economie = np.full(xout_range.size, np.nan)
+
+    for j, point in enumerate(points):
+        if point is None:
+            continue
+        evap, sim = point
+        m_steam[j] = evap.consommation_vapeur()
+        A_totale[j] = sim["A_totale"]
+        V_total[j] = np.sum(sim["V"])
+        economie[j] = evap.economie_vapeur()
+
+    valides = ~np.isnan(m_steam)
+    return pd.DataFrame({
+        "xout_pct": xout_range[valides] * 100,
+        "m_steam_kg_h": m_steam[valides],
+        "A_totale_m2": A_totale[valides],
+        "V_total_kg_h": V_total[valides],
+        "economie": economie[valides]
+    })
 
 
 def sensibilite_debit_alimentation(xF=0.15, xout=0.65, T_feed=85.0,
@@ -84,24 +152,29 @@ def sensibilite_debit_alimentation(xF=0.15, xout=0.65, T_feed=85.0,
     F_max = F_nominal * (1 + variation_pct/100)
     
     F_range = np.linspace(F_min, F_max, 9)
-    resultats = []
-    
-    for F in F_range:
-        try:
-            evap = EvaporateurMultiple(F, xF, xout, T_feed, P_steam, n_effets)
-            sim = evap.simuler()
-            
-            resultats.append({
-                "F_kg_h": float(F),
-                "variation_pct": float((F - F_nominal) / F_nominal * 100),
-                "m_steam_kg_h": float(evap.consommation_vapeur()),
-                "A_totale_m2": float(sim["A_totale"]),
-                "economie": float(evap.economie_vapeur())
-            })
-        except:
-            pass
-    
-    return pd.DataFrame(resultats)
+    points = _simuler_points([(F, xF, xout, T_feed, P_steam, n_effets)
+                              for F in F_range])
+
+    m_steam = np.full(F_range.size, np.nan)
+    A_totale = np.full(F_range.size, np.nan)
+    economie = np.full(F_range.size, np.nan)
+
+    for j, point in enumerate(points):
+        if point is None:
+            continue
+        evap, sim = point
+        m_steam[j] = evap.consommation_vapeur()
+        A_totale[j] = sim["A_totale"]
+        economie[j] = evap.economie_vapeur()
+
+    valides = ~np.isnan(m_steam)
+    return pd.DataFrame({
+        "F_kg_h": F_range[valides],
+        "variation_pct": (F_range[valides] - F_nominal) / F_nominal * 100,
+        "m_steam_kg_h": m_steam[valides],
+        "A_totale_m2": A_totale[valides],
+        "economie": economie[valides]
+    })
 
 
 def sensibilite_temperature_alimentation(F=20000.0, xF=0.15, xout=0.65,
@@ -112,23 +185,28 @@ def sensibilite_temperature_alimentation(F=20000.0, xF=0.15, xout=0.65,
     CDC Section 4.1.3
     """
     T_range = np.linspace(T_min, T_max, n_points)
-    resultats = []
-    
-    for T_feed in T_range:
-        try:
-            evap = EvaporateurMultiple(F, xF, xout, T_feed, P_steam, n_effets)
-            sim = evap.simuler()
-            
-            resultats.append({
-                "T_feed_C": float(T_feed),
-                "m_steam_kg_h": float(evap.consommation_vapeur()),
-                "A_totale_m2": float(sim["A_totale"]),
-                "economie": float(evap.economie_vapeur())
-            })
-        except:
-            pass
-    
-    return pd.DataFrame(resultats)
+    points = _simuler_points([(F, xF, xout, T_feed, P_steam, n_effets)
+                              for T_feed in T_range])
+
+    m_steam = np.full(T_range.size, np.nan)
+    A_totale = np.full(T_range.size, np.nan)
+    economie = np.full(T_range.size, np.nan)
+
+    for j, point in enumerate(points):
+        if point is None:
+            continue
+        evap, sim = point
+        m_steam[j] = evap.consommation_vapeur()
+        A_totale[j] = sim["A_totale"]
+        economie[j] = evap.economie_vapeur()
+
+    valides = ~np.isnan(m_steam)
+    return pd.DataFrame({
+        "T_feed_C": T_range[valides],
+        "m_steam_kg_h": m_steam[valides],
+        "A_totale_m2": A_totale[valides],
+        "economie": economie[valides]
+    })
 
 
 def sensibilite_nombre_effets(F=20000.0, xF=0.15, xout=0.65, T_feed=85.0,
@@ -137,23 +215,20 @@ def sensibilite_nombre_effets(F=20000.0, xF=0.15, xout=0.65, T_feed=85.0,
     Analyse de sensibilité : Nombre d'effets (pour Streamlit).
     Compatible avec l'interface existante.
     """
-    resultats = []
-    
-    for n in range(n_min, n_max + 1):
-        try:
-            evap = EvaporateurMultiple(F, xF, xout, T_feed, P_steam, n_effets=n)
-            sim = evap.simuler()
-            
-            resultats.append({
-                "Nombre_effets": n,
-                "Debit_vapeur_S": float(evap.consommation_vapeur()),
-                "Surface_totale_A": float(sim["A_totale"]),
-                "Economie": float(evap.economie_vapeur())
-            })
-        except:
-            pass
-    
-    return pd.DataFrame(resultats)
+    ns = np.arange(n_min, n_max + 1)
+    m_steam, A_totale, economie = simulation_evaporation_multi_effets_batch(
+        ns, F=F, xF=xF, xout=xout, T_feed=T_feed, P_steam=P_steam
+    )
+
+    # Colonnes SoA déjà en ndarrays : le DataFrame est construit en un
+    # bloc, sans liste de dicts ligne à ligne
+    valides = ~np.isnan(m_steam)
+    return pd.DataFrame({
+        "Nombre_effets": ns[valides],
+        "Debit_vapeur_S": m_steam[valides],
+        "Surface_totale_A": A_totale[valides],
+        "Economie": economie[valides]
+    })
 
 
 def analyse_sensibilite_complete():
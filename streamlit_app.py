@@ -1,22 +1,132 @@
 # streamlit_app.py - VERSION CORRIGÉE
+import io
+
 import streamlit as st
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+# pyarrow (optionnel) : écriture CSV vectorisée pour les exports
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 from evaporateurs import simulation_evaporation_multi_effets
 from cristallisation import simuler_cristallisation_batch, comparer_profils, calculer_rendement_massique
 from sensibilite import analyse_sensibilite_complete
+from thermodynamique import COOLPROP_AVAILABLE, _construire_table_saturation
 
 
 st.set_page_config(page_title="PIC — Évaporation & Cristallisation", layout="wide")
 
+
+# =============================
+# CALCULS MÉMOÏSÉS (st.cache_data)
+# =============================
+# Les entrées sont des scalaires hashables : relancer avec les mêmes
+# paramètres (ou toucher un widget sans rapport) ne redéclenche ni la
+# simulation évaporateur ni l'intégration du bilan de population.
+
+def _sous_echantillonner_minmax(t, y, n_cibles=1000):
+    """
+    Sous-échantillonnage min/max (style M4) d'une série temporelle.
+
+    Le coût de rendu croît avec le nombre de points alors que l'écran n'en
+    résout qu'environ n_cibles : on garde le min et le max de chaque bin
+    (plus les deux extrémités), ce qui préserve l'enveloppe visuelle de la
+    courbe. Les séries courtes sont retournées telles quelles.
+    """
+    n = t.shape[0]
+    if n <= 2 * n_cibles:
+        return t, y
+    k = n // n_cibles
+    m = n_cibles * k
+    blocs = y[:m].reshape(n_cibles, k)
+    base = np.arange(n_cibles) * k
+    idx = np.unique(np.concatenate([
+        base + blocs.argmin(axis=1),
+        base + blocs.argmax(axis=1),
+        [0, n - 1]
+    ]))
+    return t[idx], y[idx]
+
+
+@st.cache_data(max_entries=32)
+def _df_en_csv(df):
+    """
+    Sérialise un DataFrame en bytes CSV (UTF-8) pour un download_button.
+
+    Mémoïsé par st.cache_data (hachage du DataFrame) : Streamlit rejoue
+    tout le script à chaque interaction, sans cache les exports seraient
+    resérialisés à chaque rerun et pas seulement au clic.
+
+    Passe par l'écrivain C++ de pyarrow quand il est disponible (pas de
+    formatage Python ligne à ligne) ; sinon retombe sur df.to_csv.
+    """
+    if PYARROW_AVAILABLE:
+        buf = io.BytesIO()
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+        return buf.getvalue()
+    return df.to_csv(index=False).encode('utf-8')
+
+
+@st.cache_data(max_entries=64)
+def _run_evap(F_kg_h, xF, xout, n_effets, T_steam_C, T_last_C):
+    return simulation_evaporation_multi_effets(
+        F_kg_h=F_kg_h, xF=xF, xout=xout, n_effets=n_effets,
+        T_steam_C=T_steam_C, T_last_C=T_last_C
+    )
+
+
+@st.cache_data(max_entries=64)
+def _run_crist(M_batch, C_init, T_init, duree_s, dt, profil):
+    return simuler_cristallisation_batch(
+        M_batch, C_init, T_init, duree_s, dt=dt, profil=profil
+    )
+
+
+@st.cache_data(max_entries=32)
+def _run_comparaison(M_batch, C_init, T_init, duree_s):
+    return comparer_profils(M_batch, C_init, T_init, duree_s)
+
+
+@st.cache_data
+def _run_sensibilite():
+    return analyse_sensibilite_complete()
+
+
+@st.cache_resource
+def _table_saturation():
+    """
+    Construit la table de saturation CoolProp une seule fois par serveur.
+
+    st.cache_resource stocke un objet global partagé entre sessions (au
+    contraire de st.cache_data, par entrée) : le coût des ~6000 appels
+    PropsSI de la grille n'est payé qu'au premier chargement de l'app,
+    pas à chaque utilisateur ni à chaque rerun.
+    """
+    return _construire_table_saturation()
+
+
+# Sans CoolProp, pas de table : les corrélations empiriques de
+# thermodynamique prennent le relais comme avant
+if COOLPROP_AVAILABLE:
+    _table_saturation()
+
+
 st.title("🧪 Projet — Évaporation multiple & Cristallisation du saccharose")
 st.caption("Interface web (Streamlit)")
 
 # Initialisation session state
 if "evap_res" not in st.session_state:
     st.session_state.evap_res = None
+if "evap_details" not in st.session_state:
+    # DataFrame des détails par effet, construit UNE fois par simulation
+    # et partagé entre les graphiques, le tableau et l'export CSV
+    st.session_state.evap_details = None
 if "crist_res" not in st.session_state:
     st.session_state.crist_res = None
 if "sens_res" not in st.session_state:
@@ -52,7 +162,7 @@ with tab_evap:
     if st.button("▶ Lancer simulation évaporation", type="primary"):
         with st.spinner("Calcul en cours..."):
             try:
-                res = simulation_evaporation_multi_effets(
+                res = _run_evap(
                     F_kg_h=F_kg_h,
                     xF=xF,
                     xout=xout,
@@ -61,6 +171,7 @@ with tab_evap:
                     T_last_C=54.0     # Correspond à 0.15 bar
                 )
                 st.session_state.evap_res = res
+                st.session_state.evap_details = pd.DataFrame(res["details"], copy=False)
                 st.success("Simulation terminée !")
             except Exception as e:
                 st.error(f"Erreur : {e}")
@@ -79,8 +190,10 @@ with tab_evap:
         # Graphiques
         st.subheader("📈 Profils par effet")
         if res["details"]:
-            details = pd.DataFrame(res["details"])
-            
+            if st.session_state.evap_details is None:
+                st.session_state.evap_details = pd.DataFrame(res["details"], copy=False)
+            details = st.session_state.evap_details
+
             fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 10))
             
             # Températures
@@ -115,6 +228,7 @@ with tab_evap:
             
             plt.tight_layout()
             st.pyplot(fig)
+            plt.close(fig)
             
             # Tableau détaillé
             st.subheader("📋 Résultats détaillés par effet")
@@ -153,8 +267,8 @@ with tab_crist:
             with st.spinner("Calcul en cours..."):
                 try:
                     duree_s = int(duree_h * 3600)
-                    L, n, hist = simuler_cristallisation_batch(
-                        M_batch, C_init, T_init, duree_s, dt=dt_sim, profil=profil
+                    L, n, hist = _run_crist(
+                        M_batch, C_init, T_init, duree_s, dt_sim, profil
                     )
                     st.session_state.crist_res = {
                         "L": L, "n": n, "hist": hist, "profil": profil
@@ -168,7 +282,7 @@ with tab_crist:
             with st.spinner("Comparaison des 3 profils en cours..."):
                 try:
                     duree_s = int(duree_h * 3600)
-                    resultats = comparer_profils(M_batch, C_init, T_init, duree_s)
+                    resultats = _run_comparaison(M_batch, C_init, T_init, duree_s)
                     st.session_state.crist_compare = resultats
                     st.session_state.show_comparison = True
                     st.success("✅ Comparaison terminée !")
@@ -253,6 +367,7 @@ with tab_crist:
             
             plt.tight_layout()
             st.pyplot(fig)
+            plt.close(fig)
             
             # Recommandation
             st.subheader("💡 Recommandation")
@@ -279,11 +394,11 @@ with tab_crist:
         hist = res["hist"]
         
         # Convertir en arrays
-        t_array = np.array(hist["t"])
-        T_array = np.array(hist["T"])
-        S_array = np.array(hist["S"])
-        Lmean_array = np.array(hist["Lmean"]) * 1e6
-        CV_array = np.array(hist["CV"]) * 100
+        t_array = np.asarray(hist["t"])
+        T_array = np.asarray(hist["T"])
+        S_array = np.asarray(hist["S"])
+        Lmean_array = np.asarray(hist["Lmean"]) * 1e6
+        CV_array = np.asarray(hist["CV"]) * 100
         
         # Résultats finaux
         Lmean_final = float(Lmean_array[-1])
@@ -326,17 +441,24 @@ with tab_crist:
         st.subheader("📈 Évolution temporelle")
         
         fig, axes = plt.subplots(2, 2, figsize=(13, 10))
-        
+
+        # Sous-échantillonnage min/max des longues simulations : borne le
+        # nombre de points tracés sans perdre les extrema visibles
+        t_T, T_plot = _sous_echantillonner_minmax(t_array, T_array)
+        t_S, S_plot = _sous_echantillonner_minmax(t_array, S_array)
+        t_L, Lmean_plot = _sous_echantillonner_minmax(t_array, Lmean_array)
+        t_CV, CV_plot = _sous_echantillonner_minmax(t_array, CV_array)
+
         # 1. Température
-        axes[0, 0].plot(t_array/3600, T_array, 'b-', linewidth=2)
-        axes[0, 0].fill_between(t_array/3600, T_array, T_final, alpha=0.2, color='blue')
+        axes[0, 0].plot(t_T/3600, T_plot, 'b-', linewidth=2)
+        axes[0, 0].fill_between(t_T/3600, T_plot, T_final, alpha=0.2, color='blue')
         axes[0, 0].set_xlabel("Temps (h)")
         axes[0, 0].set_ylabel("Température (°C)")
         axes[0, 0].set_title(f"Profil {profil}")
         axes[0, 0].grid(True, alpha=0.3)
         
         # 2. Sursaturation
-        axes[0, 1].plot(t_array/3600, S_array, 'r-', linewidth=2)
+        axes[0, 1].plot(t_S/3600, S_plot, 'r-', linewidth=2)
         axes[0, 1].set_xlabel("Temps (h)")
         axes[0, 1].set_ylabel("Sursaturation S")
         axes[0, 1].set_title("Évolution de la sursaturation")
@@ -346,12 +468,12 @@ with tab_crist:
             axes[0, 1].legend()
         
         # 3. Croissance
-        axes[1, 0].plot(t_array/3600, Lmean_array, 'g-', linewidth=2)
+        axes[1, 0].plot(t_L/3600, Lmean_plot, 'g-', linewidth=2)
         axes[1, 0].axhline(y=450, color='r', linestyle='--', label='Cible: 450 μm')
-        axes[1, 0].fill_between(t_array/3600, Lmean_array, 450, 
-                               where=(Lmean_array>=450), alpha=0.2, color='green')
-        axes[1, 0].fill_between(t_array/3600, Lmean_array, 450,
-                               where=(Lmean_array<450), alpha=0.2, color='orange')
+        axes[1, 0].fill_between(t_L/3600, Lmean_plot, 450,
+                               where=(Lmean_plot>=450), alpha=0.2, color='green')
+        axes[1, 0].fill_between(t_L/3600, Lmean_plot, 450,
+                               where=(Lmean_plot<450), alpha=0.2, color='orange')
         axes[1, 0].set_xlabel("Temps (h)")
         axes[1, 0].set_ylabel("Lmean (μm)")
         axes[1, 0].set_title("Croissance des cristaux")
@@ -359,12 +481,12 @@ with tab_crist:
         axes[1, 0].legend()
         
         # 4. CV
-        axes[1, 1].plot(t_array/3600, CV_array, 'purple', linewidth=2)
+        axes[1, 1].plot(t_CV/3600, CV_plot, 'purple', linewidth=2)
         axes[1, 1].axhline(y=30, color='r', linestyle='--', label='Limite: 30%')
-        axes[1, 1].fill_between(t_array/3600, CV_array, 30,
-                               where=(CV_array<=30), alpha=0.2, color='green')
-        axes[1, 1].fill_between(t_array/3600, CV_array, 30,
-                               where=(CV_array>30), alpha=0.2, color='red')
+        axes[1, 1].fill_between(t_CV/3600, CV_plot, 30,
+                               where=(CV_plot<=30), alpha=0.2, color='green')
+        axes[1, 1].fill_between(t_CV/3600, CV_plot, 30,
+                               where=(CV_plot>30), alpha=0.2, color='red')
         axes[1, 1].set_xlabel("Temps (h)")
         axes[1, 1].set_ylabel("CV (%)")
         axes[1, 1].set_title("Coefficient de variation")
@@ -373,6 +495,7 @@ with tab_crist:
         
         plt.tight_layout()
         st.pyplot(fig)
+        plt.close(fig)
         
         # Distribution finale
         st.subheader("📊 Distribution de taille finale")
@@ -410,6 +533,7 @@ with tab_crist:
         
         plt.tight_layout()
         st.pyplot(fig2)
+        plt.close(fig2)
     
     # AFFICHAGE COMPARAISON
     if 'crist_compare' in st.session_state:
@@ -483,6 +607,7 @@ with tab_crist:
         
         plt.tight_layout()
         st.pyplot(fig3)
+        plt.close(fig3)
         
         # Recommandation
         st.subheader("💡 Recommandation")
@@ -524,7 +649,7 @@ with tab_sens:
     if st.button("▶ Lancer analyse complète de sensibilité", type="primary"):
         with st.spinner("Exécution des analyses..."):
             try:
-                analyses = analyse_sensibilite_complete()
+                analyses = _run_sensibilite()
                 st.session_state.sens_res = analyses
                 st.success("Analyses terminées !")
             except Exception as e:
@@ -548,6 +673,7 @@ with tab_sens:
             ax.grid(True)
             ax.legend()
             st.pyplot(fig)
+            plt.close(fig)
         
         with tabs_sens[1]:
             st.dataframe(analyses["concentration_finale"], width='stretch')  # CORRIGÉ ICI
@@ -658,8 +784,10 @@ with tab_export:
     
     with col1:
         if st.session_state.evap_res:
-            details = pd.DataFrame(st.session_state.evap_res["details"])
-            csv = details.to_csv(index=False).encode('utf-8')
+            if st.session_state.evap_details is None:
+                st.session_state.evap_details = pd.DataFrame(st.session_state.evap_res["details"], copy=False)
+            details = st.session_state.evap_details
+            csv = _df_en_csv(details)
             st.download_button(
                 "📥 Données évaporation",
                 data=csv,
@@ -670,8 +798,8 @@ with tab_export:
     
     with col2:
         if st.session_state.crist_res:
-            hist = pd.DataFrame(st.session_state.crist_res["hist"])
-            csv = hist.to_csv(index=False).encode('utf-8')
+            hist = pd.DataFrame(st.session_state.crist_res["hist"], copy=False)
+            csv = _df_en_csv(hist)
             st.download_button(
                 "📥 Historique cristallisation",
                 data=csv,
@@ -685,7 +813,7 @@ with tab_export:
             # Exporter la sensibilité au nombre d'effets
             if "nombre_effets" in st.session_state.sens_res:
                 df = st.session_state.sens_res["nombre_effets"]
-                csv = df.to_csv(index=False).encode('utf-8')
+                csv = _df_en_csv(df)
                 st.download_button(
                     "📥 Sensibilité",
                     data=csv,
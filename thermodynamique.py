@@ -1,5 +1,7 @@
 # thermodynamique.py
 import numpy as np
+from functools import lru_cache
+from math import log as _mlog
 
 # Import CoolProp (obligatoire selon CDC)
 try:
@@ -11,14 +13,36 @@ except ImportError:
 
 
 def to_float(x, default=0.0):
-    """Force un scalaire float même si x est un tableau numpy."""
+    """
+    Force un scalaire float même si x est un tableau numpy.
+
+    Chemin rapide sans ndarray pour les scalaires (le cas de loin le plus
+    courant : float, int, np.float64, tableau 0-d) ; la coercition
+    np.asarray n'est payée que pour les tableaux de taille > 0-d.
+    """
+    if type(x) is float:
+        return x
     try:
-        a = np.asarray(x)
-        if a.size == 0:
-            return float(default)
-        return float(a.reshape(-1)[0])
+        return float(x)
     except Exception:
-        return float(default)
+        try:
+            a = np.asarray(x).reshape(-1)
+            return float(a[0]) if a.size else float(default)
+        except Exception:
+            return float(default)
+
+
+@lru_cache(maxsize=2048)
+def _propsi_cached(out, k1, v1, k2, v2, fluid):
+    """
+    PropsSI mémoïsé (appels scalaires).
+
+    PropsSI est une fonction pure mais chaque appel paie le dispatch
+    Python→C et une résolution itérative de saturation ; les simulations
+    et balayages requestionnent sans cesse les mêmes états. Les appelants
+    quantifient v1/v2 (round) pour rendre les clés hashables et stables.
+    """
+    return PropsSI(out, k1, v1, k2, v2, fluid)
 
 
 def Tsat_water_from_Pbar(Pbar):
@@ -27,14 +51,17 @@ def Tsat_water_from_Pbar(Pbar):
     Utilise CoolProp pour des valeurs exactes.
     
     Pbar : pression en bar (absolu)
-    Retourne : température de saturation en °C
+    Retourne : température de saturation en °C (ndarray si Pbar en est un)
     """
+    if np.ndim(Pbar) > 0:
+        return Tsat_water_from_Pbar_vec(Pbar)
+
     P = max(to_float(Pbar), 0.01)
     P_Pa = P * 1e5  # Conversion bar → Pa
     
     if COOLPROP_AVAILABLE:
         try:
-            T_K = PropsSI('T', 'P', P_Pa, 'Q', 0, 'Water')  # Q=0 : liquide saturé
+            T_K = _propsi_cached('T', 'P', round(P_Pa, 3), 'Q', 0, 'Water')  # Q=0 : liquide saturé
             return float(T_K - 273.15)  # K → °C
         except:
             pass
@@ -43,6 +70,73 @@ def Tsat_water_from_Pbar(Pbar):
     return 100.0 + 28.0 * np.log(P)
 
 
+# Table de saturation (espace contre temps) : Tsat et λ tabulées sur une
+# grille log de pressions, interrogées ensuite par np.interp au lieu de
+# refaire la résolution itérative de saturation de CoolProp à chaque appel.
+# Construite paresseusement au premier usage (3 appels PropsSI batchés).
+_TABLE_SAT_PBAR = (0.01, 20.0)  # Domaine couvert (bar)
+_table_sat = None
+
+
+def _construire_table_saturation(n_points=2001):
+    """Construit (une fois) la table P → (Tsat °C, λ kJ/kg)."""
+    global _table_sat
+    if _table_sat is None:
+        P_Pa = np.geomspace(_TABLE_SAT_PBAR[0] * 1e5,
+                            _TABLE_SAT_PBAR[1] * 1e5, n_points)
+        Tsat = np.asarray(PropsSI('T', 'P', P_Pa, 'Q', 0, 'Water')) - 273.15
+        h_vap = np.asarray(PropsSI('H', 'P', P_Pa, 'Q', 1, 'Water'))
+        h_liq = np.asarray(PropsSI('H', 'P', P_Pa, 'Q', 0, 'Water'))
+        _table_sat = (P_Pa, Tsat, (h_vap - h_liq) / 1000.0)
+    return _table_sat
+
+
+def Tsat_water_from_Pbar_vec(P_bar, strict=False):
+    """
+    Version vectorisée de Tsat_water_from_Pbar : interpolation dans la
+    table de saturation précalculée (ou, si strict=True ou hors domaine,
+    un appel CoolProp exact). Retourne un ndarray (°C).
+    """
+    P = np.maximum(np.asarray(P_bar, dtype=np.float64), 0.01)
+
+    if COOLPROP_AVAILABLE:
+        try:
+            if not strict and np.all(P <= _TABLE_SAT_PBAR[1]):
+                P_grid, Tsat, _ = _construire_table_saturation()
+                return np.interp(P * 1e5, P_grid, Tsat)
+            return np.asarray(PropsSI('T', 'P', P * 1e5, 'Q', 0, 'Water')) - 273.15
+        except Exception:
+            pass
+
+    # Fallback si CoolProp échoue
+    return 100.0 + 28.0 * np.log(P)
+
+
+def latent_heat_from_Pbar_vec(P_bar, strict=False):
+    """
+    Version vectorisée de latent_heat_from_Pbar : interpolation dans la
+    table de saturation précalculée (ou, si strict=True ou hors domaine,
+    deux appels CoolProp exacts). Retourne un ndarray (kJ/kg).
+    """
+    P = np.maximum(np.asarray(P_bar, dtype=np.float64), 0.01)
+
+    if COOLPROP_AVAILABLE:
+        try:
+            if not strict and np.all(P <= _TABLE_SAT_PBAR[1]):
+                P_grid, _, lam = _construire_table_saturation()
+                return np.interp(P * 1e5, P_grid, lam)
+            P_Pa = P * 1e5
+            h_vap = np.asarray(PropsSI('H', 'P', P_Pa, 'Q', 1, 'Water'))
+            h_liq = np.asarray(PropsSI('H', 'P', P_Pa, 'Q', 0, 'Water'))
+            return (h_vap - h_liq) / 1000.0  # J/kg → kJ/kg
+        except Exception:
+            pass
+
+    # Fallback : corrélation empirique
+    T = Tsat_water_from_Pbar_vec(P)
+    return np.maximum(2500.0 - 2.42 * T, 100.0)
+
+
 def latent_heat_kJkg(Tc):
     """
     Chaleur latente de vaporisation de l'eau (kJ/kg) à température T(°C).
@@ -57,9 +151,9 @@ def latent_heat_kJkg(Tc):
     if COOLPROP_AVAILABLE:
         try:
             # Enthalpie vapeur saturée
-            h_vap = PropsSI('H', 'T', T_K, 'Q', 1, 'Water')  # Q=1 : vapeur saturée
+            h_vap = _propsi_cached('H', 'T', round(T_K, 6), 'Q', 1, 'Water')  # Q=1 : vapeur saturée
             # Enthalpie liquide saturé
-            h_liq = PropsSI('H', 'T', T_K, 'Q', 0, 'Water')  # Q=0 : liquide saturé
+            h_liq = _propsi_cached('H', 'T', round(T_K, 6), 'Q', 0, 'Water')  # Q=0 : liquide saturé
             # Chaleur latente
             L_vap = (h_vap - h_liq) / 1000.0  # J/kg → kJ/kg
             return float(L_vap)
@@ -73,14 +167,18 @@ def latent_heat_kJkg(Tc):
 def latent_heat_from_Pbar(Pbar):
     """
     Chaleur latente à une pression donnée (bar).
+    Retourne un ndarray si Pbar en est un.
     """
+    if np.ndim(Pbar) > 0:
+        return latent_heat_from_Pbar_vec(Pbar)
+
     P = max(to_float(Pbar), 0.01)
     P_Pa = P * 1e5
     
     if COOLPROP_AVAILABLE:
         try:
-            h_vap = PropsSI('H', 'P', P_Pa, 'Q', 1, 'Water')
-            h_liq = PropsSI('H', 'P', P_Pa, 'Q', 0, 'Water')
+            h_vap = _propsi_cached('H', 'P', round(P_Pa, 3), 'Q', 1, 'Water')
+            h_liq = _propsi_cached('H', 'P', round(P_Pa, 3), 'Q', 0, 'Water')
             return float((h_vap - h_liq) / 1000.0)  # kJ/kg
         except:
             pass
@@ -99,23 +197,23 @@ def EPE_Duhring(x_saccharose, T_water):
     
     Retourne : ΔT_epe (°C)
     
-    Corrélation CDC : EPE dépend de la concentration et de T
+    Corrélation CDC : EPE dépend de la concentration et de T.
+    Accepte des scalaires ou des tableaux (calcul vectorisé).
     """
-    x = to_float(x_saccharose)
-    T = to_float(T_water)
-    
-    if x <= 0:
-        return 0.0
-    
+    x = np.asarray(x_saccharose, dtype=np.float64)
+    T = np.asarray(T_water, dtype=np.float64)
+
     # Corrélation Dühring pour saccharose (empirique)
     # EPE ≈ K(T) × x^n
     # Source : Perry's Handbook, Mullin
     K = 0.08 * (1.0 + 0.004 * T)  # Coefficient dépendant de T
     n = 1.2  # Exposant empirique
-    
-    EPE = K * (x ** n) * 100  # x en fraction → EPE en °C
-    
-    return float(max(EPE, 0.0))
+
+    EPE = np.where(x > 0, K * np.maximum(x, 0.0) ** n * 100, 0.0)
+
+    if EPE.ndim == 0:
+        return float(EPE)
+    return EPE
 
 
 def Cp_solution_saccharose(x_saccharose, T_C):
@@ -134,7 +232,7 @@ def Cp_solution_saccharose(x_saccharose, T_C):
     # Cp eau (CoolProp)
     if COOLPROP_AVAILABLE:
         try:
-            Cp_water_J = PropsSI('C', 'T', T_K, 'P', 101325, 'Water')  # J/kg/K
+            Cp_water_J = _propsi_cached('C', 'T', round(T_K, 6), 'P', 101325, 'Water')  # J/kg/K
             Cp_water = Cp_water_J / 1000.0  # kJ/kg/K
         except:
             Cp_water = 4.18  # Fallback
@@ -173,7 +271,7 @@ def enthalpie_vapeur(P_bar):
     
     if COOLPROP_AVAILABLE:
         try:
-            h_vap = PropsSI('H', 'P', P_Pa, 'Q', 1, 'Water')
+            h_vap = _propsi_cached('H', 'P', round(P_Pa, 3), 'Q', 1, 'Water')
             return float(h_vap / 1000.0)  # J/kg → kJ/kg
         except:
             pass
@@ -194,7 +292,7 @@ def enthalpie_liquide(P_bar):
     
     if COOLPROP_AVAILABLE:
         try:
-            h_liq = PropsSI('H', 'P', P_Pa, 'Q', 0, 'Water')
+            h_liq = _propsi_cached('H', 'P', round(P_Pa, 3), 'Q', 0, 'Water')
             return float(h_liq / 1000.0)  # kJ/kg
         except:
             pass
@@ -204,22 +302,42 @@ def enthalpie_liquide(P_bar):
     return float(Cp_solution_saccharose(0.0, T) * T)
 
 
-def LMTD(dT1, dT2):
+def LMTD(dT1, dT2, eps=1e-9):
     """
     Différence de température logarithmique moyenne (LMTD).
-    
+
     dT1 : ΔT à l'entrée (K ou °C)
     dT2 : ΔT à la sortie (K ou °C)
+
+    Sans branche Python : les cas dégénérés (ΔT ≤ 0 → 0, ΔT1 ≈ ΔT2 → ΔT)
+    sont traités par masques np.where, donc la fonction accepte aussi des
+    tableaux de ΔT (un LMTD par effet en un seul appel). Les scalaires
+    Python, cas de loin le plus courant dans le code évaporateur, passent
+    par un chemin rapide math.log sans aucune allocation ndarray.
     """
-    dT1 = to_float(dT1)
-    dT2 = to_float(dT2)
-    
-    if dT1 <= 0.0 or dT2 <= 0.0:
-        return 0.0
-    if abs(dT1 - dT2) < 1e-9:
-        return float(dT1)
-    
-    return float((dT1 - dT2) / np.log(dT1 / dT2))
+    if isinstance(dT1, (int, float)) and isinstance(dT2, (int, float)):
+        if dT1 <= 0.0 or dT2 <= 0.0:
+            return 0.0
+        if abs(dT1 - dT2) < eps:
+            return 0.5 * (dT1 + dT2)
+        return (dT1 - dT2) / _mlog(dT1 / dT2)
+
+    a = np.asarray(dT1, dtype=np.float64)
+    b = np.asarray(dT2, dtype=np.float64)
+
+    bad = (a <= 0.0) | (b <= 0.0)
+    close = np.abs(a - b) < eps
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Ratio neutralisé là où le log serait indéfini ou instable
+        ratio = np.where(bad | close, 1.0, a / b)
+        lm = np.where(close, 0.5 * (a + b), (a - b) / np.log(ratio))
+
+    out = np.where(bad, 0.0, lm)
+
+    if out.ndim == 0:
+        return float(out)
+    return out
 
 
 def coefficient_U_effet(effet_num, n_total):